@@ -18,7 +18,11 @@ Ce que vous devez faire :
 from __future__ import annotations
 
 import argparse
+import itertools
 import logging
+import re
+import sys
+from typing import Iterator
 
 from .config import AppConfig
 from .exceptions import (
@@ -29,13 +33,25 @@ from .exceptions import (
 )
 from .logging_conf import configure_logging
 from .services import InventoryManager
-from .utils import format_table
+from .utils import format_cents, format_rate
 
 logger = logging.getLogger(__name__)
 
+# Validation des saisies numériques avant conversion (message précis par champ)
+_INT_RE = re.compile(r"\d+")
+_FLOAT_RE = re.compile(r"\d+(?:\.\d+)?")
+
 
 def _prompt(text: str) -> str:
-    return input(text).strip()
+    """Lit une ligne sur stdin ; l'invite n'est affichée qu'en mode interactif (TTY)."""
+    stdin = sys.stdin
+    if stdin.isatty():
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    line = stdin.readline()
+    if not line:
+        raise EOFError
+    return line.strip()
 
 
 def print_menu() -> None:
@@ -50,22 +66,49 @@ def print_menu() -> None:
     print("8) Quitter")
 
 
+INVENTORY_HEADERS = ("ID", "SKU", "Nom", "Catégorie", "Prix HT", "TVA", "Prix TTC", "Stock")
+# Largeurs fixes pour l'affichage en flux (une cellule plus longue déborde simplement)
+INVENTORY_COL_WIDTHS = (4, 8, 32, 14, 9, 5, 9, 6)
+
+
+def _inventory_cells(p) -> tuple:
+    return (
+        str(p.id or ""),
+        p.sku,
+        p.name,
+        p.category,
+        format_cents(p.unit_price_ht_cents),
+        format_rate(p.vat_rate_bps),
+        format_cents(p.unit_price_ttc_cents),
+        str(p.quantity),
+    )
+
+
 def render_inventory_table(products) -> str:
-    headers = ["ID", "SKU", "Nom", "Catégorie", "Prix HT", "TVA", "Prix TTC", "Stock"]
+    """Rendu tabulaire de l'inventaire en une seule passe (cellules + largeurs)."""
+    widths = [len(h) for h in INVENTORY_HEADERS]
     rows = []
     for p in products:
-        unit_ttc = round(p.unit_price_ht * (1 + p.vat_rate), 2)
-        rows.append([
-            str(p.id or ""),
-            p.sku,
-            p.name,
-            p.category,
-            f"{p.unit_price_ht:.2f}",
-            f"{p.vat_rate:.2f}",
-            f"{unit_ttc:.2f}",
-            str(p.quantity),
-        ])
-    return format_table(headers, rows)
+        cells = _inventory_cells(p)
+        for i, cell in enumerate(cells):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+        rows.append(cells)
+    if not rows:
+        return "(aucune donnée)"
+
+    row_fmt = " | ".join(f"%-{w}s" for w in widths)
+    sep = "-+-".join("-" * w for w in widths)
+    return "\n".join([row_fmt % INVENTORY_HEADERS, sep] + [row_fmt % cells for cells in rows])
+
+
+def render_inventory_rows(products) -> Iterator[str]:
+    """Rendu ligne par ligne (largeurs fixes) : en-tête, séparateur puis un produit par ligne."""
+    row_fmt = " | ".join(f"%-{w}s" for w in INVENTORY_COL_WIDTHS)
+    yield row_fmt % INVENTORY_HEADERS
+    yield "-+-".join("-" * w for w in INVENTORY_COL_WIDTHS)
+    for p in products:
+        yield row_fmt % _inventory_cells(p)
 
 
 def action_initialize(app: InventoryManager) -> None:
@@ -76,18 +119,33 @@ def action_initialize(app: InventoryManager) -> None:
     print(f"Initialisation réussie : {count} produit(s) importé(s).")
 
 
-def action_list_inventory(app: InventoryManager) -> None:
-    products = app.list_inventory()
-    if not products:
+def action_list_inventory(app: InventoryManager, pretty: bool = False) -> None:
+    if pretty:
+        products = app.list_inventory()
+        if not products:
+            print("(inventaire vide)")
+            return
+        print("\n" + render_inventory_table(products))
+        return
+
+    it = app.iter_inventory()
+    first = next(it, None)
+    if first is None:
         print("(inventaire vide)")
         return
-    print("\n" + render_inventory_table(products))
+    out = sys.stdout.write
+    out("\n")
+    for line in render_inventory_rows(itertools.chain((first,), it)):
+        out(line)
+        out("\n")
 
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Inventory CLI — starter kit")
     p.add_argument("--db", default="data/inventory.db", help="Chemin du fichier SQLite (.db)")
     p.add_argument("--log-level", default="INFO", help="DEBUG/INFO/WARNING/ERROR")
+    p.add_argument("--pretty", action="store_true",
+                   help="Inventaire aligné sur le contenu (charge tout avant affichage)")
     return p
 
 def action_add_product(app: InventoryManager) -> None:
@@ -101,24 +159,31 @@ def action_add_product(app: InventoryManager) -> None:
     qty_str = _prompt("Quantité : ")
     tva_str = _prompt("TVA (défaut 0.20) : ") or "0.20"
     
-    try:
-        prix_ht = float(prix_str)
-        qty = int(qty_str)
-        tva = float(tva_str)
-    except ValueError:
-        print("Erreur : prix/quantité/TVA invalides")
+    if not _FLOAT_RE.fullmatch(prix_str):
+        print("Erreur : prix HT invalide")
+        return
+    if not _INT_RE.fullmatch(qty_str):
+        print("Erreur : quantité invalide")
         return
+    if not _FLOAT_RE.fullmatch(tva_str):
+        print("Erreur : TVA invalide")
+        return
+    prix_ht = float(prix_str)
+    qty = int(qty_str)
+    tva = float(tva_str)
     
-    app.add_product(sku, name, category, prix_ht, qty, tva)
-    print(f"Produit {sku} ajouté avec succès !")
+    try:
+        app.add_product(sku, name, category, prix_ht, qty, tva)
+        print(f"Produit {sku} ajouté avec succès !")
+    except ValueError as e:
+        print(f"Erreur : {e}")
 def action_update_product(app: InventoryManager) -> None:
     """Modifier un produit."""
     print("\n--- Modifier un produit ---")
     sku = _prompt("SKU du produit à modifier : ")
     
     # verif existence
-    products = app.list_inventory()
-    if not any(p.sku == sku for p in products):
+    if not app.exists_sku(sku):
         print(f"Produit {sku} introuvable")
         return
     
@@ -129,6 +194,15 @@ def action_update_product(app: InventoryManager) -> None:
     qty_str = _prompt("Nouvelle quantité : ")
     tva_str = _prompt("Nouvelle TVA : ")
     
+    if prix_str and not _FLOAT_RE.fullmatch(prix_str):
+        print("Erreur : prix HT invalide")
+        return
+    if qty_str and not _INT_RE.fullmatch(qty_str):
+        print("Erreur : quantité invalide")
+        return
+    if tva_str and not _FLOAT_RE.fullmatch(tva_str):
+        print("Erreur : TVA invalide")
+        return
     prix_ht = float(prix_str) if prix_str else None
     qty = int(qty_str) if qty_str else None
     tva = float(tva_str) if tva_str else None
@@ -200,48 +274,59 @@ def main() -> int:
 
     configure_logging(log_level=args.log_level)
     config = AppConfig(db_path=args.db)
-    app = InventoryManager(config)
+    try:
+        app = InventoryManager(config)
+    except DatabaseError as e:
+        logger.error("Database error: %s", e)
+        print(f"Erreur base de données: {e}")
+        return 1
 
     logger.info("App started with db=%s", config.db_path)
 
-    while True:
-        try:
-            print_menu()
-            choice = _prompt("Votre choix (1-8) : ")
-
-            if choice == "1":
-                action_initialize(app)
-            elif choice == "2":
-                action_list_inventory(app)
-            elif choice == "3":
-                action_add_product(app)
-            elif choice == "4":
-                action_update_product(app)
-            elif choice == "5":
-                action_delete_product(app)
-            elif choice == "6":
-                action_sell_product(app)
-            elif choice == "7":
-                action_dashboard(app)
-            elif choice == "8":
-                print("Au revoir.")
+    try:
+        while True:
+            try:
+                print_menu()
+                choice = _prompt("Votre choix (1-8) : ")
+
+                if choice == "1":
+                    action_initialize(app)
+                elif choice == "2":
+                    action_list_inventory(app, pretty=args.pretty)
+                elif choice == "3":
+                    action_add_product(app)
+                elif choice == "4":
+                    action_update_product(app)
+                elif choice == "5":
+                    action_delete_product(app)
+                elif choice == "6":
+                    action_sell_product(app)
+                elif choice == "7":
+                    action_dashboard(app)
+                elif choice == "8":
+                    print("Au revoir.")
+                    return 0
+                else:
+                    print("Choix invalide. Veuillez saisir un nombre entre 1 et 8.")
+
+            except (ValidationError, DataImportError) as e:
+                logger.warning("Validation/import error: %s", e)
+                print(f"Erreur: {e}")
+            except DatabaseError as e:
+                logger.error("Database error: %s", e)
+                print(f"Erreur base de données: {e}")
+            except InventoryError as e:
+                logger.error("Inventory error: %s", e)
+                print(f"Erreur: {e}")
+            except KeyboardInterrupt:
+                print("\nInterruption utilisateur. Au revoir.")
+                return 130
+            except EOFError:
+                print("\nFin de l'entrée. Au revoir.")
                 return 0
-            else:
-                print("Choix invalide. Veuillez saisir un nombre entre 1 et 8.")
-
-        except (ValidationError, DataImportError) as e:
-            logger.warning("Validation/import error: %s", e)
-            print(f"Erreur: {e}")
-        except DatabaseError as e:
-            logger.error("Database error: %s", e)
-            print(f"Erreur base de données: {e}")
-        except InventoryError as e:
-            logger.error("Inventory error: %s", e)
-            print(f"Erreur: {e}")
-        except KeyboardInterrupt:
-            print("\nInterruption utilisateur. Au revoir.")
-            return 130
-        except Exception:
-            logger.exception("Unexpected error")
-            print("Erreur inattendue. Consultez le fichier de logs.")
-            return 1
+            except Exception:
+                logger.exception("Unexpected error")
+                print("Erreur inattendue. Consultez le fichier de logs.")
+                return 1
+    finally:
+        app.close()
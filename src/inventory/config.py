@@ -19,3 +19,5 @@ class AppConfig:
     """Configuration de l'application."""
     db_path: str
     default_vat_rate: float = 0.20
+    # Cache mémoire de l'inventaire (désactiver si la DB est partagée entre processus)
+    cache_inventory: bool = True
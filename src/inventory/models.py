@@ -18,31 +18,48 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Product:
-    """Un produit stocké dans la table `products`."""
+    """
+    Un produit stocké dans la table `products`.
+
+    Les montants sont en centimes et la TVA en points de base (2000 = 20 %) :
+    tous les calculs restent en entiers.
+    """
 
     sku: str
     name: str
     category: str
-    unit_price_ht: float
+    unit_price_ht_cents: int
     quantity: int
-    vat_rate: float = 0.20
+    vat_rate_bps: int = 2000
     id: Optional[int] = None
     created_at: Optional[str] = None
 
+    @property
+    def unit_price_ht(self) -> float:
+        return self.unit_price_ht_cents / 100.0
+
+    @property
+    def vat_rate(self) -> float:
+        return self.vat_rate_bps / 10000.0
+
+    @property
+    def unit_price_ttc_cents(self) -> int:
+        return (self.unit_price_ht_cents * (10000 + self.vat_rate_bps) + 5000) // 10000
+
 
 @dataclass
 class Sale:
-    """Représente une vente."""
+    """Représente une vente (montants en centimes, TVA en points de base)."""
     product_id: int
     sku: str
     quantity: int
-    unit_price_ht: float
-    vat_rate: float
-    total_ht: float
-    total_vat: float
-    total_ttc: float
+    unit_price_ht_cents: int
+    vat_rate_bps: int
+    total_ht_cents: int
+    total_vat_cents: int
+    total_ttc_cents: int
     sold_at: str
     id: Optional[int] = None
 
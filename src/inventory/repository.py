@@ -23,10 +23,11 @@ from __future__ import annotations
 import logging
 import sqlite3
 from contextlib import contextmanager
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, Tuple
 
 from .exceptions import DatabaseError
 from .models import Product, now_iso
+from .utils import SQLITE_INT_MAX, calc_totals_cents
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +39,8 @@ CREATE TABLE IF NOT EXISTS products (
   sku TEXT NOT NULL UNIQUE,
   name TEXT NOT NULL,
   category TEXT NOT NULL,
-  unit_price_ht REAL NOT NULL CHECK(unit_price_ht >= 0),
-  vat_rate REAL NOT NULL DEFAULT 0.20 CHECK(vat_rate >= 0 AND vat_rate <= 1),
+  unit_price_ht_cents INTEGER NOT NULL CHECK(unit_price_ht_cents >= 0),
+  vat_rate_bps INTEGER NOT NULL DEFAULT 2000 CHECK(vat_rate_bps >= 0 AND vat_rate_bps <= 10000),
   quantity INTEGER NOT NULL CHECK(quantity >= 0),
   created_at TEXT NOT NULL
 );
@@ -49,26 +50,120 @@ CREATE TABLE IF NOT EXISTS sales (
   product_id INTEGER NOT NULL,
   sku TEXT NOT NULL,
   quantity INTEGER NOT NULL CHECK(quantity > 0),
-  unit_price_ht REAL NOT NULL CHECK(unit_price_ht >= 0),
-  vat_rate REAL NOT NULL CHECK(vat_rate >= 0 AND vat_rate <= 1),
-  total_ht REAL NOT NULL CHECK(total_ht >= 0),
-  total_vat REAL NOT NULL CHECK(total_vat >= 0),
-  total_ttc REAL NOT NULL CHECK(total_ttc >= 0),
+  unit_price_ht_cents INTEGER NOT NULL CHECK(unit_price_ht_cents >= 0),
+  vat_rate_bps INTEGER NOT NULL CHECK(vat_rate_bps >= 0 AND vat_rate_bps <= 10000),
+  total_ht_cents INTEGER NOT NULL CHECK(total_ht_cents >= 0),
+  total_vat_cents INTEGER NOT NULL CHECK(total_vat_cents >= 0),
+  total_ttc_cents INTEGER NOT NULL CHECK(total_ttc_cents >= 0),
   sold_at TEXT NOT NULL,
   FOREIGN KEY(product_id) REFERENCES products(id) ON DELETE RESTRICT
 );
 
-CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+-- `sku ... UNIQUE` crée déjà un index (sqlite_autoindex_products_1) : l'ancien doublon est supprimé
+DROP INDEX IF EXISTS idx_products_sku;
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
 CREATE INDEX IF NOT EXISTS idx_sales_sku ON sales(sku);
+-- index couvrant : dashboard (global ou par période) lu sans toucher à la table
+CREATE INDEX IF NOT EXISTS idx_sales_sold_at
+  ON sales(sold_at, quantity, total_ht_cents, total_vat_cents, total_ttc_cents);
 """
 
+# Anciennes colonnes REAL -> (nouvelle colonne entière, facteur, déclaration)
+LEGACY_MONEY_COLUMNS = {
+    "products": [
+        ("unit_price_ht", "unit_price_ht_cents", 100,
+         "INTEGER NOT NULL DEFAULT 0 CHECK(unit_price_ht_cents >= 0)"),
+        ("vat_rate", "vat_rate_bps", 10000,
+         "INTEGER NOT NULL DEFAULT 2000 CHECK(vat_rate_bps >= 0 AND vat_rate_bps <= 10000)"),
+    ],
+    "sales": [
+        ("unit_price_ht", "unit_price_ht_cents", 100,
+         "INTEGER NOT NULL DEFAULT 0 CHECK(unit_price_ht_cents >= 0)"),
+        ("vat_rate", "vat_rate_bps", 10000,
+         "INTEGER NOT NULL DEFAULT 0 CHECK(vat_rate_bps >= 0 AND vat_rate_bps <= 10000)"),
+        ("total_ht", "total_ht_cents", 100, "INTEGER NOT NULL DEFAULT 0 CHECK(total_ht_cents >= 0)"),
+        ("total_vat", "total_vat_cents", 100, "INTEGER NOT NULL DEFAULT 0 CHECK(total_vat_cents >= 0)"),
+        ("total_ttc", "total_ttc_cents", 100, "INTEGER NOT NULL DEFAULT 0 CHECK(total_ttc_cents >= 0)"),
+    ],
+}
+
+
+def _migrate_legacy_money(conn: sqlite3.Connection) -> None:
+    """
+    Convertit les anciennes colonnes monétaires REAL en centimes / points de base.
+    Toute la migration tient dans une seule transaction explicite : en cas d'échec,
+    la base reste dans son ancien format et la migration est rejouée au prochain lancement.
+    """
+    pending = []
+    for table, columns in LEGACY_MONEY_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        todo = [col for col in columns if col[0] in existing]
+        if todo:
+            pending.append((table, existing, todo))
+    if not pending:
+        return
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        raise DatabaseError(
+            f"Migration de la base impossible : SQLite >= 3.35 requis "
+            f"(version installée : {sqlite3.sqlite_version})."
+        )
+
+    conn.execute("BEGIN")
+    try:
+        for table, existing, todo in pending:
+            for old, new, factor, decl in todo:
+                if new not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {new} {decl}")
+                conn.execute(f"UPDATE {table} SET {new} = CAST(ROUND({old} * {factor}) AS INTEGER)")
+                conn.execute(f"ALTER TABLE {table} DROP COLUMN {old}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    for table, _, todo in pending:
+        for old, new, _, _ in todo:
+            logger.info("Colonne %s.%s migrée vers %s.", table, old, new)
+
+
+def _row_to_product(row: sqlite3.Row) -> Product:
+    return Product(
+        id=int(row["id"]),
+        sku=str(row["sku"]),
+        name=str(row["name"]),
+        category=str(row["category"]),
+        unit_price_ht_cents=int(row["unit_price_ht_cents"]),
+        vat_rate_bps=int(row["vat_rate_bps"]),
+        quantity=int(row["quantity"]),
+        created_at=str(row["created_at"]),
+    )
+
 
 class SQLiteRepository:
     """Repository SQLite minimal (starter)."""
 
     def __init__(self, db_path: str) -> None:
         self.db_path = db_path
+        self._schema_ready = False
+        # une seule connexion pour toute la durée de vie du repository
+        try:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur ouverture SQLite: {e}") from e
+        try:
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("PRAGMA cache_size = -65536")  # 64 Mo
+            self.conn.execute("PRAGMA temp_store = MEMORY")
+            # schéma + migration des anciennes bases avant toute autre requête
+            self.create_schema_if_needed()
+        except sqlite3.Error as e:
+            self.conn.close()
+            raise DatabaseError(f"Erreur ouverture SQLite: {e}") from e
+        except BaseException:
+            self.conn.close()
+            raise
     
     def sell_product_transaction(self, sku: str, quantity_sold: int) -> dict:
         """
@@ -90,19 +185,21 @@ class SQLiteRepository:
                     )
                 
                 # 3) Calculs
-                total_ht = round(product.unit_price_ht * quantity_sold, 2)
-                total_vat = round(total_ht * product.vat_rate, 2)
-                total_ttc = round(total_ht + total_vat, 2)
+                ht_cents, vat_cents, ttc_cents = calc_totals_cents(
+                    product.unit_price_ht_cents, quantity_sold, product.vat_rate_bps
+                )
+                if ttc_cents > SQLITE_INT_MAX:
+                    raise DatabaseError(f"Montant de la vente trop élevé pour {sku}")
                 
                 # 4) Inserer la vente
                 cur = conn.execute(
                     """
-                    INSERT INTO sales(product_id, sku, quantity, unit_price_ht, vat_rate,
-                                      total_ht, total_vat, total_ttc, sold_at)
+                    INSERT INTO sales(product_id, sku, quantity, unit_price_ht_cents, vat_rate_bps,
+                                      total_ht_cents, total_vat_cents, total_ttc_cents, sold_at)
                     VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
-                    (product.id, sku, quantity_sold, product.unit_price_ht, product.vat_rate,
-                     total_ht, total_vat, total_ttc, now_iso())
+                    (product.id, sku, quantity_sold, product.unit_price_ht_cents, product.vat_rate_bps,
+                     ht_cents, vat_cents, ttc_cents, now_iso())
                 )
                 sale_id = cur.lastrowid
                 
@@ -114,60 +211,66 @@ class SQLiteRepository:
                 )
                 
                 conn.commit()
-                logger.info("Vente enregistrée : %s x%d = %.2f€ TTC", sku, quantity_sold, total_ttc)
+                logger.info("Vente enregistrée : %s x%d = %d centimes TTC", sku, quantity_sold, ttc_cents)
                 
                 return {
                     "sale_id": sale_id,
                     "sku": sku,
                     "quantity": quantity_sold,
-                    "total_ht": total_ht,
-                    "total_vat": total_vat,
-                    "total_ttc": total_ttc,
+                    "total_ht_cents": ht_cents,
+                    "total_vat_cents": vat_cents,
+                    "total_ttc_cents": ttc_cents,
+                    "total_ht": ht_cents / 100.0,
+                    "total_vat": vat_cents / 100.0,
+                    "total_ttc": ttc_cents / 100.0,
                 }
                 
             except sqlite3.Error as e:
                 conn.rollback()
                 raise DatabaseError(f"Erreur transaction vente: {e}") from e
  
-    def get_dashboard_stats(self) -> dict:
-        """Calcule les statistiques de ventes (CA HT, TVA, TTC, nb ventes, qty totale)."""
+    def dashboard_totals(self) -> dict:
+        """
+        Statistiques de ventes (nb ventes, qty totale, CA HT, TVA, TTC) en une seule requête
+        d'agrégation ; les centimes ne sont convertis en euros qu'au retour.
+        """
         with self.connect() as conn:
             cur = conn.execute(
                 """
-                SELECT 
+                SELECT
                     COUNT(*) as nb_ventes,
                     COALESCE(SUM(quantity), 0) as qty_totale,
-                    COALESCE(SUM(total_ht), 0) as ca_ht,
-                    COALESCE(SUM(total_vat), 0) as tva_totale,
-                    COALESCE(SUM(total_ttc), 0) as ca_ttc
+                    COALESCE(SUM(total_ht_cents), 0) as ca_ht_cents,
+                    COALESCE(SUM(total_vat_cents), 0) as tva_totale_cents,
+                    COALESCE(SUM(total_ttc_cents), 0) as ca_ttc_cents
                 FROM sales
                 """
             )
             row = cur.fetchone()
-            
+
             return {
                 "nb_ventes": int(row["nb_ventes"]),
                 "qty_totale": int(row["qty_totale"]),
-                "ca_ht": round(float(row["ca_ht"]), 2),
-                "tva_totale": round(float(row["tva_totale"]), 2),
-                "ca_ttc": round(float(row["ca_ttc"]), 2),
-            }            
+                "ca_ht": row["ca_ht_cents"] / 100.0,
+                "tva_totale": row["tva_totale_cents"] / 100.0,
+                "ca_ttc": row["ca_ttc_cents"] / 100.0,
+            }
 
     @contextmanager
-    def connect(self) -> Iterable[sqlite3.Connection]:
-        """Connexion SQLite avec FK activées."""
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Connexion SQLite partagée ; toute transaction laissée ouverte par une erreur est annulée."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA foreign_keys = ON")
-            yield conn
-        except sqlite3.Error as e:
-            raise DatabaseError(f"Erreur SQLite: {e}") from e
-        finally:
-            try:
-                conn.close()  # type: ignore[name-defined]
-            except Exception:
-                pass
+            yield self.conn
+        except BaseException as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            if isinstance(e, sqlite3.Error):
+                raise DatabaseError(f"Erreur SQLite: {e}") from e
+            raise
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self.conn.close()
 
     def reset_and_create_schema(self) -> None:
         """Supprime les tables puis recrée le schéma (remise à zéro)."""
@@ -177,17 +280,22 @@ class SQLiteRepository:
                 conn.execute("DROP TABLE IF EXISTS products")
                 conn.executescript(SCHEMA_SQL)
                 conn.commit()
+                self._schema_ready = True
                 logger.info("DB reset + schema created.")
             except sqlite3.Error as e:
                 conn.rollback()
                 raise DatabaseError(f"Erreur création schéma: {e}") from e
 
     def create_schema_if_needed(self) -> None:
-        """Crée le schéma si les tables n'existent pas (sans reset)."""
+        """Crée le schéma si les tables n'existent pas (sans reset), une seule fois par instance."""
+        if self._schema_ready:
+            return
         with self.connect() as conn:
             try:
+                _migrate_legacy_money(conn)
                 conn.executescript(SCHEMA_SQL)
                 conn.commit()
+                self._schema_ready = True
             except sqlite3.Error as e:
                 conn.rollback()
                 raise DatabaseError(f"Erreur création schéma: {e}") from e
@@ -197,10 +305,11 @@ class SQLiteRepository:
             try:
                 cur = conn.execute(
                     """
-                    INSERT INTO products(sku,name,category,unit_price_ht,vat_rate,quantity,created_at)
+                    INSERT INTO products(sku,name,category,unit_price_ht_cents,vat_rate_bps,quantity,created_at)
                     VALUES(?,?,?,?,?,?,?)
                     """,
-                    (p.sku, p.name, p.category, p.unit_price_ht, p.vat_rate, p.quantity, p.created_at or now_iso()),
+                    (p.sku, p.name, p.category, p.unit_price_ht_cents, p.vat_rate_bps, p.quantity,
+                     p.created_at or now_iso()),
                 )
                 conn.commit()
                 return int(cur.lastrowid)
@@ -211,127 +320,67 @@ class SQLiteRepository:
                 conn.rollback()
                 raise DatabaseError(f"Erreur insert produit: {e}") from e
 
+    def bulk_insert_products(self, rows: Iterable[Tuple]) -> None:
+        """
+        Insère plusieurs produits en une seule transaction (executemany).
+        Chaque tuple : (sku, name, category, unit_price_ht_cents, quantity, vat_rate_bps, created_at).
+        """
+        with self.connect() as conn:
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO products(sku,name,category,unit_price_ht_cents,quantity,vat_rate_bps,created_at)
+                    VALUES(?,?,?,?,?,?,?)
+                    """,
+                    rows,
+                )
+                conn.commit()
+            except sqlite3.IntegrityError as e:
+                conn.rollback()
+                raise DatabaseError(f"Contrainte violée (SKU unique ?) : {e}") from e
+            except sqlite3.Error as e:
+                conn.rollback()
+                raise DatabaseError(f"Erreur insert produits: {e}") from e
+
     def list_products(self) -> List[Product]:
+        return list(self.iter_products())
+
+    def iter_products(self) -> Iterator[Product]:
+        """Parcourt les produits un par un (curseur SQLite, sans fetchall)."""
         with self.connect() as conn:
             cur = conn.execute("SELECT * FROM products ORDER BY sku ASC")
-            out: List[Product] = []
-            for row in cur.fetchall():
-                out.append(Product(
-                    id=int(row["id"]),
-                    sku=str(row["sku"]),
-                    name=str(row["name"]),
-                    category=str(row["category"]),
-                    unit_price_ht=float(row["unit_price_ht"]),
-                    vat_rate=float(row["vat_rate"]),
-                    quantity=int(row["quantity"]),
-                    created_at=str(row["created_at"]),
-                ))
-            return out
-    
-    def get_product_by_sku(self, sku: str) -> Product | None:  # ← AJOUTE 4 ESPACES ICI
+            for row in cur:
+                yield _row_to_product(row)
+
+    def get_product_by_sku(self, sku: str) -> Product | None:
         """Récupère un produit par son SKU (ou None si absent)."""
         with self.connect() as conn:
             cur = conn.execute("SELECT * FROM products WHERE sku = ?", (sku,))
             row = cur.fetchone()
             if not row:
                 return None
-            return Product(
-                id=int(row["id"]),
-                sku=str(row["sku"]),
-                name=str(row["name"]),
-                category=str(row["category"]),
-                unit_price_ht=float(row["unit_price_ht"]),
-                vat_rate=float(row["vat_rate"]),
-                quantity=int(row["quantity"]),
-                created_at=str(row["created_at"]),
-            )
+            return _row_to_product(row)
+
+    def exists_sku(self, sku: str) -> bool:
+        """Indique si un produit existe pour ce SKU (lookup indexé, sans charger la ligne)."""
+        with self.connect() as conn:
+            cur = conn.execute("SELECT 1 FROM products WHERE sku = ? LIMIT 1", (sku,))
+            return cur.fetchone() is not None
 
-    def get_product_by_id(self, product_id: int) -> Product | None:  # ← AJOUTE 4 ESPACES ICI
+    def get_product_by_id(self, product_id: int) -> Product | None:
         """Récupère un produit par son ID."""
         with self.connect() as conn:
             cur = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,))
             row = cur.fetchone()
             if not row:
                 return None
-            return Product(
-                id=int(row["id"]),
-                sku=str(row["sku"]),
-                name=str(row["name"]),
-                category=str(row["category"]),
-                unit_price_ht=float(row["unit_price_ht"]),
-                vat_rate=float(row["vat_rate"]),
-                quantity=int(row["quantity"]),
-                created_at=str(row["created_at"]),
-            )
-        
-        
-def update_product(self, sku: str, name: str | None = None, 
-                      category: str | None = None, 
-                      unit_price_ht: float | None = None,
-                      quantity: int | None = None, 
-                      vat_rate: float | None = None) -> None:
-        """Met à jour un produit existant (seuls les champs non-None sont modifiés)."""
-        product = self.get_product_by_sku(sku)
-        if not product:
-            raise DatabaseError(f"Produit {sku} introuvable")
-        
-        # construction dynamique de la requete
-        updates = []
-        params = []
-        
-        if name is not None:
-            updates.append("name = ?")
-            params.append(name)
-        if category is not None:
-            updates.append("category = ?")
-            params.append(category)
-        if unit_price_ht is not None:
-            updates.append("unit_price_ht = ?")
-            params.append(unit_price_ht)
-        if quantity is not None:
-            updates.append("quantity = ?")
-            params.append(quantity)
-        if vat_rate is not None:
-            updates.append("vat_rate = ?")
-            params.append(vat_rate)
-        
-        if not updates:
-            return  # rien a modifier
-        
-        params.append(sku)
-        sql = f"UPDATE products SET {', '.join(updates)} WHERE sku = ?"
-        
-        with self.connect() as conn:
-            try:
-                conn.execute(sql, params)
-                conn.commit()
-                logger.info("Produit %s mis à jour", sku)
-            except sqlite3.Error as e:
-                conn.rollback()
-                raise DatabaseError(f"Erreur update produit: {e}") from e
-
-def delete_product(self, sku: str) -> None:
-        """Supprime un produit (ou échoue si FK contrainte)."""
-        with self.connect() as conn:
-            try:
-                cur = conn.execute("DELETE FROM products WHERE sku = ?", (sku,))
-                if cur.rowcount == 0:
-                    raise DatabaseError(f"Produit {sku} introuvable")
-                conn.commit()
-                logger.info("Produit %s supprimé", sku)
-            except sqlite3.IntegrityError as e:
-                conn.rollback()
-                raise DatabaseError(f"Impossible de supprimer : produit lié à des ventes") from e
-            except sqlite3.Error as e:
-                conn.rollback()
-                raise DatabaseError(f"Erreur delete produit: {e}") from e       
-            
+            return _row_to_product(row)
 
-def update_product(self, sku: str, name: str | None = None, 
+    def update_product(self, sku: str, name: str | None = None,
                       category: str | None = None, 
-                      unit_price_ht: float | None = None,
+                      unit_price_ht_cents: int | None = None,
                       quantity: int | None = None, 
-                      vat_rate: float | None = None) -> None:
+                      vat_rate_bps: int | None = None) -> None:
         """Met à jour un produit existant (seuls les champs non-None sont modifiés)."""
         product = self.get_product_by_sku(sku)
         if not product:
@@ -347,15 +396,15 @@ def update_product(self, sku: str, name: str | None = None,
         if category is not None:
             updates.append("category = ?")
             params.append(category)
-        if unit_price_ht is not None:
-            updates.append("unit_price_ht = ?")
-            params.append(unit_price_ht)
+        if unit_price_ht_cents is not None:
+            updates.append("unit_price_ht_cents = ?")
+            params.append(unit_price_ht_cents)
         if quantity is not None:
             updates.append("quantity = ?")
             params.append(quantity)
-        if vat_rate is not None:
-            updates.append("vat_rate = ?")
-            params.append(vat_rate)
+        if vat_rate_bps is not None:
+            updates.append("vat_rate_bps = ?")
+            params.append(vat_rate_bps)
         
         if not updates:
             return  # rien a modifier
@@ -372,7 +421,7 @@ def update_product(self, sku: str, name: str | None = None,
                 conn.rollback()
                 raise DatabaseError(f"Erreur update produit: {e}") from e
 
-def delete_product(self, sku: str) -> None:
+    def delete_product(self, sku: str) -> None:
         """Supprime un produit (ou échoue si FK contrainte)."""
         with self.connect() as conn:
             try:
@@ -387,4 +436,3 @@ def delete_product(self, sku: str) -> None:
             except sqlite3.Error as e:
                 conn.rollback()
                 raise DatabaseError(f"Erreur delete produit: {e}") from e
-
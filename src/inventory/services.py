@@ -17,22 +17,49 @@ Ce que vous devez faire :
 from __future__ import annotations
 
 import logging
-from typing import List, Optional
+import math
+from typing import Iterator, List, Optional
 
 from .config import AppConfig
 from .models import Product, now_iso
 from .repository import SQLiteRepository
-from .utils import load_initial_json
+from .utils import SQLITE_INT_MAX, load_initial_json, to_bps, to_cents
 
 logger = logging.getLogger(__name__)
 
 
+def _price_to_cents(unit_price_ht: float) -> int:
+    """Convertit un prix HT en centimes en refusant les montants hors capacité SQLite."""
+    if not math.isfinite(unit_price_ht):
+        raise ValueError("Prix HT trop élevé")
+    cents = to_cents(unit_price_ht)
+    if cents > SQLITE_INT_MAX:
+        raise ValueError("Prix HT trop élevé")
+    return cents
+
+
 class InventoryManager:
     """Service principal du domaine 'stock'."""
 
     def __init__(self, config: AppConfig, repo: Optional[SQLiteRepository] = None) -> None:
         self.config = config
+        # on ne ferme que le repository que l'on a créé soi-même
+        self._owns_repo = repo is None
         self.repo = repo or SQLiteRepository(config.db_path)
+        self._inv_cache: Optional[List[Product]] = None
+        # incrémenté à chaque écriture : un parcours en cours ne remplit pas un cache périmé
+        self._inv_version = 0
+
+    def close(self) -> None:
+        """Libère les ressources (connexion SQLite) si le repository appartient au manager."""
+        if self._owns_repo:
+            self.repo.close()
+
+    def __enter__(self) -> InventoryManager:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def sell_product(self, sku: str, quantity: int) -> dict:
         """Vend un produit (transaction atomique)."""
@@ -40,13 +67,16 @@ class InventoryManager:
             raise ValueError("Quantité doit être > 0")
         
         result = self.repo.sell_product_transaction(sku, quantity)
-        logger.info("Vente effectuée : %s", result)
+        self._invalidate_inventory()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Vente effectuée : sku=%s qty=%d ttc=%d centimes",
+                        result["sku"], result["quantity"], result["total_ttc_cents"])
         return result
 
     def get_dashboard(self) -> dict:
         """Retourne les stats dashboard."""
         self.repo.create_schema_if_needed()
-        stats = self.repo.get_dashboard_stats()
+        stats = self.repo.dashboard_totals()
         logger.info("Dashboard consulté")
         return stats
 
@@ -55,33 +85,63 @@ class InventoryManager:
         logger.info("Initialization requested from JSON: %s", json_path)
         payload = load_initial_json(json_path)
         products = payload["products"]
+        ts = now_iso()  # même horodatage pour tout l'import
 
+        # invalider avant le reset : les tables sont supprimées même si l'insert échoue ensuite
+        self._invalidate_inventory()
         if reset:
             self.repo.reset_and_create_schema()
         else:
             self.repo.create_schema_if_needed()
 
-        count = 0
-        for p in products:
-            prod = Product(
-                sku=p["sku"],
-                name=p["name"],
-                category=p["category"],
-                unit_price_ht=p["unit_price_ht"],
-                quantity=p["quantity"],
-                vat_rate=p["vat_rate"],
-                created_at=now_iso(),
-            )
-            self.repo.insert_product(prod)
-            count += 1
+        self.repo.bulk_insert_products(
+            (p["sku"], p["name"], p["category"], p["unit_price_ht_cents"],
+             p["quantity"], p["vat_rate_bps"], ts)
+            for p in products
+        )
+        count = len(products)
 
         logger.info("Initialization OK. %d products inserted.", count)
         return count
 
     def list_inventory(self) -> List[Product]:
         """Retourne la liste des produits (inventaire)."""
+        if self._inv_cache is not None:
+            return list(self._inv_cache)
         self.repo.create_schema_if_needed()
-        return self.repo.list_products()
+        products = self.repo.list_products()
+        if self.config.cache_inventory:
+            self._inv_cache = products
+        return list(products)
+
+    def iter_inventory(self) -> Iterator[Product]:
+        """
+        Parcourt l'inventaire produit par produit (depuis le cache s'il est chargé).
+        Un parcours complet de la table remplit le cache, comme `list_inventory`.
+        """
+        if self._inv_cache is not None:
+            return iter(self._inv_cache)
+        self.repo.create_schema_if_needed()
+        if not self.config.cache_inventory:
+            return self.repo.iter_products()
+        return self._iter_and_cache()
+
+    def _iter_and_cache(self) -> Iterator[Product]:
+        version = self._inv_version
+        products: List[Product] = []
+        for p in self.repo.iter_products():
+            products.append(p)
+            yield p
+        if version == self._inv_version:
+            self._inv_cache = products
+
+    def _invalidate_inventory(self) -> None:
+        self._inv_cache = None
+        self._inv_version += 1
+
+    def exists_sku(self, sku: str) -> bool:
+        """Vrai si le SKU est présent dans l'inventaire."""
+        return self.repo.exists_sku(sku)
 
     def add_product(self, sku: str, name: str, category: str, 
                     unit_price_ht: float, quantity: int, vat_rate: float = 0.20) -> None:
@@ -91,8 +151,11 @@ class InventoryManager:
             raise ValueError("Prix HT doit être >= 0")
         if quantity < 0:
             raise ValueError("Quantité doit être >= 0")
+        if quantity > SQLITE_INT_MAX:
+            raise ValueError("Quantité trop élevée")
         if not (0 <= vat_rate <= 1):
             raise ValueError("TVA doit être entre 0 et 1")
+        unit_price_ht_cents = _price_to_cents(unit_price_ht)
         
         # verif sku unique dans la bdd
         existing = self.repo.get_product_by_sku(sku)
@@ -103,12 +166,13 @@ class InventoryManager:
             sku=sku,
             name=name,
             category=category,
-            unit_price_ht=unit_price_ht,
+            unit_price_ht_cents=unit_price_ht_cents,
             quantity=quantity,
-            vat_rate=vat_rate,
+            vat_rate_bps=to_bps(vat_rate),
             created_at=now_iso(),
         )
         self.repo.insert_product(prod)
+        self._invalidate_inventory()
         logger.info("Produit ajouté : %s", sku)
 
     def update_product(self, sku: str, name: str | None = None,
@@ -122,13 +186,22 @@ class InventoryManager:
             raise ValueError("Prix HT doit être >= 0")
         if quantity is not None and quantity < 0:
             raise ValueError("Quantité doit être >= 0")
+        if quantity is not None and quantity > SQLITE_INT_MAX:
+            raise ValueError("Quantité trop élevée")
         if vat_rate is not None and not (0 <= vat_rate <= 1):
             raise ValueError("TVA doit être entre 0 et 1")
         
-        self.repo.update_product(sku, name, category, unit_price_ht, quantity, vat_rate)
+        self.repo.update_product(
+            sku, name, category,
+            _price_to_cents(unit_price_ht) if unit_price_ht is not None else None,
+            quantity,
+            to_bps(vat_rate) if vat_rate is not None else None,
+        )
+        self._invalidate_inventory()
         logger.info("Produit %s modifié", sku)
 
     def delete_product(self, sku: str) -> None:
         """Supprime un produit."""
         self.repo.delete_product(sku)
+        self._invalidate_inventory()
         logger.info("Produit %s supprimé", sku)
@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import json
 import os
+from decimal import ROUND_HALF_UP, Decimal
 from typing import Any, Dict, List, Tuple
 
 from .exceptions import DataImportError, ValidationError
@@ -87,8 +88,43 @@ def calc_totals(unit_price_ht: float, quantity: int, vat_rate: float) -> Tuple[f
     return total_ht, total_vat, total_ttc
 
 
+# Plus grand entier stockable dans une colonne INTEGER SQLite (64 bits signé)
+SQLITE_INT_MAX = 2**63 - 1
+
+
+def calc_totals_cents(unit_price_ht_cents: int, quantity: int, vat_rate_bps: int) -> Tuple[int, int, int]:
+    """Calcule HT/TVA/TTC en centimes (arrondi au centime le plus proche, demi vers le haut)."""
+    total_ht = unit_price_ht_cents * quantity
+    total_vat = (total_ht * vat_rate_bps + 5000) // 10000
+    return total_ht, total_vat, total_ht + total_vat
+
+
+def to_cents(amount: float) -> int:
+    """Convertit un montant en euros (ex: 49.9) en centimes (4990)."""
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_bps(rate: float) -> int:
+    """Convertit un taux (ex: 0.055) en points de base (550)."""
+    return int(Decimal(str(rate)).scaleb(4).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents: int) -> str:
+    """Formate des centimes positifs en euros à 2 décimales (4990 -> '49.90')."""
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+def format_rate(bps: int) -> str:
+    """Formate un taux en points de base avec 2 décimales (2000 -> '0.20', 550 -> '0.06')."""
+    hundredths = (bps + 50) // 100  # arrondi au centième, demi vers le haut
+    return f"{hundredths // 100}.{hundredths % 100:02d}"
+
+
 def load_initial_json(path: str) -> Dict[str, Any]:
-    """Charge et valide le JSON d'initialisation fourni par l'utilisateur."""
+    """
+    Charge et valide le JSON d'initialisation fourni par l'utilisateur.
+    Les prix sont convertis une seule fois en centimes et les taux en points de base.
+    """
     ensure_file_exists(path)
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -128,9 +164,9 @@ def load_initial_json(path: str) -> Dict[str, Any]:
             "sku": sku,
             "name": name,
             "category": category,
-            "unit_price_ht": unit_price_ht,
+            "unit_price_ht_cents": to_cents(unit_price_ht),
             "quantity": quantity,
-            "vat_rate": vat_rate,
+            "vat_rate_bps": to_bps(vat_rate),
         })
 
     return {"vat_rate_default": vat_default, "products": normalized}
@@ -0,0 +1,92 @@
+"""
+tests/test_cli.py
+
+Tests de la couche présentation (rendu de l'inventaire).
+"""
+
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from inventory.cli import _prompt, action_add_product, render_inventory_rows, render_inventory_table
+from inventory.config import AppConfig
+from inventory.models import Product
+from inventory.services import InventoryManager
+from inventory.utils import format_table
+
+
+class TestRenderInventory(unittest.TestCase):
+    def test_render_matches_format_table(self):
+        products = [
+            Product(id=1, sku="P001", name="Clavier mécanique", category="Informatique",
+                    unit_price_ht_cents=4990, quantity=20, vat_rate_bps=2000),
+            Product(id=2, sku="P002", name="Souris", category="Info",
+                    unit_price_ht_cents=500, quantity=3, vat_rate_bps=550),
+        ]
+        expected = format_table(
+            ["ID", "SKU", "Nom", "Catégorie", "Prix HT", "TVA", "Prix TTC", "Stock"],
+            [
+                ["1", "P001", "Clavier mécanique", "Informatique", "49.90", "0.20", "59.88", "20"],
+                ["2", "P002", "Souris", "Info", "5.00", "0.06", "5.28", "3"],
+            ],
+        )
+        self.assertEqual(render_inventory_table(products), expected)
+
+    def test_render_empty(self):
+        self.assertEqual(render_inventory_table([]), "(aucune donnée)")
+
+    def test_render_rows_streams_header_then_products(self):
+        products = iter([
+            Product(id=1, sku="P001", name="A", category="C", unit_price_ht_cents=1000, quantity=2),
+        ])
+        lines = list(render_inventory_rows(products))
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("ID   | SKU "))
+        self.assertEqual(lines[2].split(" | ")[6].strip(), "12.00")
+
+
+class TestPrompt(unittest.TestCase):
+    def test_piped_stdin_reads_lines_without_echoing_prompt(self):
+        out = io.StringIO()
+        with mock.patch("sys.stdin", io.StringIO("  2 \n")), redirect_stdout(out):
+            self.assertEqual(_prompt("Votre choix : "), "2")
+            with self.assertRaises(EOFError):
+                _prompt("Votre choix : ")
+        self.assertEqual(out.getvalue(), "")
+
+
+class TestAddProductInput(unittest.TestCase):
+    def test_invalid_field_is_reported_by_name(self):
+        app = mock.Mock()
+        answers = iter(["P009", "Nom", "Cat", "12.50", "3", "vingt"])
+        out = io.StringIO()
+        with mock.patch("inventory.cli._prompt", lambda _: next(answers)), redirect_stdout(out):
+            action_add_product(app)
+        self.assertIn("TVA invalide", out.getvalue())
+        app.add_product.assert_not_called()
+
+    def test_out_of_range_value_is_reported_not_raised(self):
+        app = mock.Mock()
+        app.add_product.side_effect = ValueError("TVA doit être entre 0 et 1")
+        answers = iter(["P009", "Nom", "Cat", "12.50", "3", "20"])
+        out = io.StringIO()
+        with mock.patch("inventory.cli._prompt", lambda _: next(answers)), redirect_stdout(out):
+            action_add_product(app)
+        self.assertIn("Erreur : TVA doit être entre 0 et 1", out.getvalue())
+
+    def test_oversized_price_is_reported_not_raised(self):
+        # les regex n'imposent pas de longueur : la borne est vérifiée par le service
+        answers = iter(["P009", "Nom", "Cat", "9" * 20, "1", ""])
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp, \
+                InventoryManager(AppConfig(db_path=f"{tmp}/test.db")) as app, \
+                mock.patch("inventory.cli._prompt", lambda _: next(answers)), redirect_stdout(out):
+            action_add_product(app)
+            self.assertFalse(app.exists_sku("P009"))
+        self.assertIn("Erreur : Prix HT trop élevé", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+tests/test_services.py
+
+Tests des use-cases de `InventoryManager` (import, CRUD, vente, dashboard).
+"""
+
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from inventory.config import AppConfig
+from inventory.exceptions import DatabaseError
+from inventory.services import InventoryManager
+
+
+PAYLOAD = {
+    "vat_rate_default": 0.20,
+    "products": [
+        {"sku": "P001", "name": "Produit A", "category": "Cat1", "unit_price_ht": 10.0, "quantity": 5},
+        {"sku": "P002", "name": "Produit B", "category": "Cat1", "unit_price_ht": 20.0, "quantity": 2},
+    ],
+}
+
+
+class TestInventoryManager(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        tmp_path = Path(self._tmp.name)
+        self.json_path = tmp_path / "init.json"
+        self.json_path.write_text(json.dumps(PAYLOAD), encoding="utf-8")
+        self.app = InventoryManager(AppConfig(db_path=str(tmp_path / "test.db")))
+        self.app.initialize_from_json(str(self.json_path), reset=True)
+
+    def tearDown(self):
+        self.app.close()
+        self._tmp.cleanup()
+
+    def test_bulk_import_is_atomic(self):
+        # sans reset, les SKU existent déjà : aucune ligne ne doit être insérée
+        with self.assertRaises(DatabaseError):
+            self.app.initialize_from_json(str(self.json_path), reset=False)
+        self.assertEqual(len(self.app.list_inventory()), 2)
+
+    def test_exists_sku(self):
+        self.assertTrue(self.app.exists_sku("P001"))
+        self.assertFalse(self.app.exists_sku("NOPE"))
+
+    def test_inventory_cache_invalidated_on_write(self):
+        self.assertEqual(len(self.app.list_inventory()), 2)
+        self.app.add_product("P003", "Produit C", "Cat2", 5.0, 1)
+        skus = [p.sku for p in self.app.list_inventory()]
+        self.assertEqual(skus, ["P001", "P002", "P003"])
+
+    def test_update_and_delete_product(self):
+        self.app.update_product("P001", name="Produit A2", unit_price_ht=12.5)
+        p = self.app.repo.get_product_by_sku("P001")
+        self.assertEqual((p.name, p.unit_price_ht_cents), ("Produit A2", 1250))
+        self.app.delete_product("P002")
+        self.assertFalse(self.app.exists_sku("P002"))
+
+    def test_iter_inventory_fills_cache(self):
+        self.assertEqual([p.sku for p in self.app.iter_inventory()], ["P001", "P002"])
+        self.assertIsNotNone(self.app._inv_cache)
+        self.app.delete_product("P002")
+        self.assertEqual([p.sku for p in self.app.iter_inventory()], ["P001"])
+
+    def test_price_beyond_sqlite_integer_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Prix HT trop élevé"):
+            self.app.add_product("P009", "Nom", "Cat", float("99999999999999999999"), 1)
+        with self.assertRaisesRegex(ValueError, "Prix HT trop élevé"):
+            self.app.update_product("P001", unit_price_ht=float("99999999999999999999"))
+        self.assertFalse(self.app.exists_sku("P009"))
+
+    def test_sale_total_beyond_sqlite_integer_is_rejected(self):
+        self.app.add_product("BIG", "Nom", "Cat", 2**62 / 100, 3)
+        with self.assertRaisesRegex(DatabaseError, "trop élevé"):
+            self.app.sell_product("BIG", 3)
+        self.assertEqual(self.app.repo.get_product_by_sku("BIG").quantity, 3)
+
+    def test_sell_totals_use_integer_cents(self):
+        self.app.add_product("P003", "Produit C", "Cat2", 5.0, 10, vat_rate=0.055)
+        result = self.app.sell_product("P003", 1)
+        self.assertEqual(result["total_ht"], 5.0)
+        self.assertEqual(result["total_vat"], 0.28)  # 27.5 centimes -> 28
+        self.assertEqual(result["total_ttc"], 5.28)
+
+    def test_dashboard_aggregates_sales(self):
+        self.app.sell_product("P001", 2)
+        self.app.sell_product("P002", 1)
+        stats = self.app.get_dashboard()
+        self.assertEqual(stats["nb_ventes"], 2)
+        self.assertEqual(stats["qty_totale"], 3)
+        self.assertEqual(stats["ca_ht"], 40.0)
+        self.assertEqual(stats["tva_totale"], 8.0)
+        self.assertEqual(stats["ca_ttc"], 48.0)
+
+    def test_legacy_real_columns_are_migrated(self):
+        legacy = Path(self._tmp.name) / "legacy.db"
+        conn = sqlite3.connect(legacy)
+        conn.executescript(
+            """
+            CREATE TABLE products (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              sku TEXT NOT NULL UNIQUE,
+              name TEXT NOT NULL,
+              category TEXT NOT NULL,
+              unit_price_ht REAL NOT NULL CHECK(unit_price_ht >= 0),
+              vat_rate REAL NOT NULL DEFAULT 0.20 CHECK(vat_rate >= 0 AND vat_rate <= 1),
+              quantity INTEGER NOT NULL CHECK(quantity >= 0),
+              created_at TEXT NOT NULL
+            );
+            INSERT INTO products(sku, name, category, unit_price_ht, vat_rate, quantity, created_at)
+            VALUES ('L001', 'Legacy', 'Cat', 49.9, 0.055, 3, '2025-01-01T00:00:00Z');
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        with InventoryManager(AppConfig(db_path=str(legacy))) as app:
+            [p] = app.list_inventory()
+        self.assertEqual((p.unit_price_ht_cents, p.vat_rate_bps), (4990, 550))
+
+    def test_failed_legacy_migration_leaves_old_schema_intact(self):
+        legacy = Path(self._tmp.name) / "broken.db"
+        conn = sqlite3.connect(legacy)
+        conn.executescript(
+            """
+            CREATE TABLE products (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              sku TEXT NOT NULL UNIQUE,
+              name TEXT NOT NULL,
+              category TEXT NOT NULL,
+              unit_price_ht REAL NOT NULL,
+              vat_rate REAL NOT NULL DEFAULT 0.20,
+              quantity INTEGER NOT NULL,
+              created_at TEXT NOT NULL
+            );
+            INSERT INTO products(sku, name, category, unit_price_ht, vat_rate, quantity, created_at)
+            VALUES ('L001', 'Legacy', 'Cat', -1, 0.20, 3, '2025-01-01T00:00:00Z');
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        # prix négatif : le backfill viole le CHECK des centimes
+        with self.assertRaises(DatabaseError):
+            InventoryManager(AppConfig(db_path=str(legacy)))
+
+        conn = sqlite3.connect(legacy)
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+        conn.close()
+        self.assertIn("unit_price_ht", cols)
+        self.assertNotIn("unit_price_ht_cents", cols)
+
+    def test_close_leaves_injected_repository_open(self):
+        with InventoryManager(self.app.config, repo=self.app.repo) as other:
+            other.list_inventory()
+        self.assertTrue(self.app.exists_sku("P001"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,10 +38,10 @@ class TestStarterInitList(unittest.TestCase):
             }
             json_path.write_text(json.dumps(payload), encoding="utf-8")
 
-            app = InventoryManager(AppConfig(db_path=str(db_path)))
-            count = app.initialize_from_json(str(json_path), reset=True)
-            self.assertEqual(count, 2)
+            with InventoryManager(AppConfig(db_path=str(db_path))) as app:
+                count = app.initialize_from_json(str(json_path), reset=True)
+                self.assertEqual(count, 2)
 
-            products = app.list_inventory()
-            self.assertEqual(len(products), 2)
-            self.assertEqual(products[0].sku, "P001")
+                products = app.list_inventory()
+                self.assertEqual(len(products), 2)
+                self.assertEqual(products[0].sku, "P001")